@@ -15,7 +15,6 @@ import os
 import json
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Union
-from dataclasses import asdict
 
 # Import du module IA Provider (changement d'import)
 try:
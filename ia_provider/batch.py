@@ -79,6 +79,39 @@ def _save_batch_to_local_history(
         pass
 
 
+def _load_prompts_map(batch_id: str) -> Dict[str, Optional[str]]:
+    """Retourne les prompts originaux d'un lot, indexés par ``custom_id``."""
+    for item in _load_local_batch_history():
+        if item.get("id") == batch_id:
+            return {
+                req.get("custom_id"): req.get("prompt_text")
+                for req in item.get("requests", [])
+            }
+    return {}
+
+
+def _iter_jsonl(content: str):
+    """Parcourt un contenu JSONL ligne à ligne en ignorant les lignes invalides.
+
+    Les lignes sont découpées par ``str.find`` : seule la ligne courante est
+    copiée, sans liste de lignes ni tampon intermédiaire.
+    """
+    debut = 0
+    taille = len(content)
+    while debut < taille:
+        fin = content.find("\n", debut)
+        if fin == -1:
+            fin = taille
+        line = content[debut:fin]
+        debut = fin + 1
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
 # =============================================================================
 # Brique n°1 : Requête Batch standardisée
 # =============================================================================
@@ -533,6 +566,7 @@ class BatchJobManager:
                     )
                     return []
 
+                prompts_map = _load_prompts_map(batch_id)
                 for result in self.client.beta.messages.batches.results(batch_id):
                     if result.result.type == "succeeded":
                         message = result.result.message
@@ -554,6 +588,7 @@ class BatchJobManager:
                                 status="succeeded",
                                 response=response,
                                 clean_response=content,
+                                prompt_text=prompts_map.get(result.custom_id),
                                 provider="anthropic",
                                 raw_data=raw,
                             )
@@ -571,20 +606,12 @@ class BatchJobManager:
                                 custom_id=result.custom_id,
                                 status="failed",
                                 error=error,
+                                prompt_text=prompts_map.get(result.custom_id),
                                 provider="anthropic",
                                 raw_data=raw,
                             )
                         )
 
-                prompts_map = {}
-                for item in _load_local_batch_history():
-                    if item.get("id") == batch_id:
-                        for req in item.get("requests", []):
-                            prompts_map[req.get("custom_id")] = req.get("prompt_text")
-                        break
-                for res in results:
-                    res.prompt_text = prompts_map.get(res.custom_id)
-
                 return results
 
             # Provider OpenAI par défaut
@@ -593,15 +620,11 @@ class BatchJobManager:
                 print(f"⚠️ Batch {batch_id} non terminé (statut: {batch.status})")
                 return []
 
+            prompts_map = _load_prompts_map(batch_id)
+
             if getattr(batch, "output_file_id", None):
                 success_content = self.client.files.content(batch.output_file_id).text
-                for line in success_content.strip().split("\n"):
-                    if not line.strip():
-                        continue
-                    try:
-                        data = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
+                for data in _iter_jsonl(success_content):
                     response_body = data.get("response", {}).get("body", {})
                     clean_content: Optional[str] = None
                     try:
@@ -615,6 +638,7 @@ class BatchJobManager:
                             status="succeeded",
                             response=response_body,
                             clean_response=clean_content,
+                            prompt_text=prompts_map.get(data.get("custom_id")),
                             provider="openai",
                             raw_data=data,
                         )
@@ -622,32 +646,18 @@ class BatchJobManager:
 
             if getattr(batch, "error_file_id", None):
                 error_content = self.client.files.content(batch.error_file_id).text
-                for line in error_content.strip().split("\n"):
-                    if not line.strip():
-                        continue
-                    try:
-                        data = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
+                for data in _iter_jsonl(error_content):
                     results.append(
                         BatchResult(
                             custom_id=data.get("custom_id"),
                             status="failed",
                             error=data.get("response", {}).get("body"),
+                            prompt_text=prompts_map.get(data.get("custom_id")),
                             provider="openai",
                             raw_data=data,
                         )
                     )
 
-            prompts_map = {}
-            for item in _load_local_batch_history():
-                if item.get("id") == batch_id:
-                    for req in item.get("requests", []):
-                        prompts_map[req.get("custom_id")] = req.get("prompt_text")
-                    break
-            for res in results:
-                res.prompt_text = prompts_map.get(res.custom_id)
-
             return results
 
         except Exception as e:
@@ -1,23 +1,130 @@
 from __future__ import annotations
+import copy
 import io
 import json
-import logging
-from typing import Any, Dict, List, Union
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple, Union
 
 from docx import Document
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
+from docx.oxml.xmlchemy import BaseOxmlElement
+from docx.oxml.text.font import CT_RPr
+from docx.oxml.text.paragraph import CT_P
+from docx.oxml.text.run import CT_R
 from docx.shared import Pt, RGBColor
 from docx.text.paragraph import Paragraph
 from docx.table import Table, _Cell
 from docx.section import _Header, _Footer
 from docx.opc.constants import RELATIONSHIP_TYPE as RT
 from docx.text.run import Run
-import markdown as md
-from bs4 import BeautifulSoup
-from bs4.element import NavigableString, Tag
-
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+import lxml.html
+from markdown_it import MarkdownIt
+from markdown_it.token import Token
+
+# Noms qualifiés OOXML résolus une seule fois au chargement du module
+_QN_EAST_ASIA = qn("w:eastAsia")
+_QN_R_ID = qn("r:id")
+_QN_FLD_CHAR_TYPE = qn("w:fldCharType")
+_QN_XML_SPACE = qn("xml:space")
+
+# Analyseur Markdown partagé : ``parse`` ne conserve aucun état entre deux
+# appels, une seule instance suffit donc pour tous les documents et threads.
+_MD_PARSER = MarkdownIt("commonmark", {"html": True}).enable(["table"])
+
+# Balises HTML brutes des réponses : ``<br>`` devient un saut de ligne,
+# gras/italique sont interprétés, les autres balises sont ignorées.
+_HTML_TAG_RE = re.compile(r"<(/?)([a-zA-Z][\w-]*)[^>]*>|<!--.*?-->", re.DOTALL)
+_HTML_EMPHASE = {"b": "bold", "strong": "bold", "i": "italic", "em": "italic"}
+
+# Blocs HTML bruts : balises qui terminent un paragraphe, styles de liste et
+# niveaux de titre reconnus lors de la reconstruction de la structure.
+_HTML_BLOCS = frozenset({
+    "address", "article", "aside", "blockquote", "center", "dd", "div", "dl",
+    "dt", "figure", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tr", "ul",
+})
+_HTML_STYLES_LISTE = {"ul": "List Bullet", "ol": "List Number"}
+_HTML_TITRES = {f"h{n}": n for n in range(1, 7)}
+_HTML_ESPACES_RE = re.compile(r"\s+")
+
+# Segment de texte HTML à écrire : (texte, surcharges de style, lien éventuel)
+_SegmentHtml = Tuple[str, Dict[str, Any], Union[str, None]]
+
+# Caractères et motifs susceptibles de produire une mise en forme Markdown
+# (emphase, titres, listes, tableaux, code, liens, entités, paragraphes).
+# Un texte qui n'en contient aucun est un simple paragraphe.
+_MARKDOWN_SYNTAX_RE = re.compile(
+    r"[\\`*_#\[\]|<>&~=+-]|^[ \t]*\d+[.)]|^(?: {4}|\t)|\n[ \t]*\n", re.MULTILINE
+)
+
+
+# Propriétés de run (``w:rPr``) déjà construites, indexées par style résolu
+# (police, taille, couleur, gras, italique). Chaque run reçoit une copie.
+_RPR_CACHE: Dict[Tuple, CT_RPr] = {}
+
+# Squelettes ``w:hyperlink`` (run au style "Hyperlink" inclus) par style résolu.
+_HYPERLINK_CACHE: Dict[Tuple, BaseOxmlElement] = {}
+
+
+@lru_cache(maxsize=4096)
+def _parse_rgb(value: str) -> RGBColor:
+    """Convertit une couleur ``RRGGBB`` en ``RGBColor`` (résultat mis en cache)."""
+    return RGBColor.from_string(value)
+
+
+def _rpr_template(resolved: Tuple) -> CT_RPr:
+    """Retourne le ``w:rPr`` modèle correspondant à un style résolu."""
+    rpr = _RPR_CACHE.get(resolved)
+    if rpr is None:
+        font_name, size, rgb, bold, italic = resolved
+        run = Run(OxmlElement("w:r"), None)
+        if font_name:
+            run.font.name = font_name
+            run._element.get_or_add_rPr().rFonts.set(_QN_EAST_ASIA, font_name)
+        if size:
+            run.font.size = size
+        if rgb is not None:
+            run.font.color.rgb = rgb
+        run.bold = bold
+        run.italic = italic
+        rpr = _RPR_CACHE[resolved] = run._element.get_or_add_rPr()
+    return rpr
+
+
+def _hyperlink_template(resolved: Tuple) -> BaseOxmlElement:
+    """Retourne le ``w:hyperlink`` modèle (sans cible ni texte) pour un style résolu."""
+    hyperlink = _HYPERLINK_CACHE.get(resolved)
+    if hyperlink is None:
+        rpr = copy.deepcopy(_rpr_template(resolved))
+        rpr.style = "Hyperlink"
+        r = OxmlElement("w:r")
+        r.append(rpr)
+        hyperlink = OxmlElement("w:hyperlink")
+        hyperlink.append(r)
+        _HYPERLINK_CACHE[resolved] = hyperlink
+    return hyperlink
+
+
+def _nettoyer_segments(segments: List[_SegmentHtml]) -> bool:
+    """Retire les espaces de début et de fin d'une liste de segments HTML.
+
+    Retourne ``True`` s'il reste du texte à écrire.
+    """
+    while segments and not segments[0][2] and not segments[0][0].lstrip(" "):
+        segments.pop(0)
+    while segments and not segments[-1][2] and not segments[-1][0].rstrip(" "):
+        segments.pop()
+    if not segments:
+        return False
+    texte, overrides, href = segments[0]
+    if not href:
+        segments[0] = (texte.lstrip(" "), overrides, href)
+    texte, overrides, href = segments[-1]
+    if not href:
+        segments[-1] = (texte.rstrip(" "), overrides, href)
+    return any(href or (texte and not texte.isspace()) for texte, _, href in segments)
 
 
 class MarkdownToDocxConverter:
@@ -28,162 +135,352 @@ class MarkdownToDocxConverter:
 
         self.doc = document
         self.styles = styles or {}
+        # Styles résolus (police, taille, couleur, gras, italique) par
+        # combinaison ``style_name`` + surcharges, calculés une seule fois.
+        self._resolved_styles: Dict[Tuple, Tuple] = {}
+
+    def _resolve_style(
+        self, style_name: str, style_overrides: Dict[str, Any] | None
+    ) -> Tuple:
+        """Retourne le style fusionné sous forme de tuple prêt à appliquer."""
+
+        key = (style_name, tuple(sorted(style_overrides.items())) if style_overrides else ())
+        resolved = self._resolved_styles.get(key)
+        if resolved is None:
+            style = {**self.styles.get(style_name, {}), **(style_overrides or {})}
+            size = style.get("font_size")
+            rgb = None
+            if color := style.get("font_color_rgb"):
+                try:
+                    if isinstance(color, str):
+                        rgb = _parse_rgb(color)
+                    else:
+                        rgb = RGBColor(*color)
+                except Exception:
+                    rgb = None
+            resolved = (
+                style.get("font_name"),
+                Pt(size) if size else None,
+                rgb,
+                style.get("is_bold", False),
+                style.get("is_italic", False),
+            )
+            self._resolved_styles[key] = resolved
+        return resolved
 
-    def _apply_style(
+    def _run_properties(
         self,
-        run,
         style_overrides: Dict[str, Any] | None = None,
         *,
         style_name: str = "response",
-    ) -> None:
-        """Applique un style au ``run`` donné.
+    ) -> CT_RPr:
+        """Retourne une copie du ``w:rPr`` correspondant au style demandé.
 
         ``style_name`` permet de sélectionner un style de base dans ``self.styles``.
         ``style_overrides`` peut être utilisé pour modifier certains attributs.
         """
 
-        style = {**self.styles.get(style_name, {}), **(style_overrides or {})}
-
-        if font_name := style.get("font_name"):
-            run.font.name = font_name
-            run._element.rPr.rFonts.set(qn("w:eastAsia"), font_name)
-        if size := style.get("font_size"):
-            run.font.size = Pt(size)
-        if color := style.get("font_color_rgb"):
-            try:
-                if isinstance(color, str):
-                    run.font.color.rgb = RGBColor.from_string(color)
+        return copy.deepcopy(_rpr_template(self._resolve_style(style_name, style_overrides)))
+
+    def _add_run(
+        self, parent, text: str, style_overrides: Dict[str, Any] | None = None
+    ) -> CT_R:
+        """Ajoute un run stylé directement sous l'élément ``parent`` (``w:p``, ``w:hyperlink``)."""
+
+        r = OxmlElement("w:r")
+        r.append(self._run_properties(style_overrides))
+        r.text = text
+        parent.append(r)
+        return r
+
+    def _add_inline(self, p: CT_P, token: Token) -> None:
+        """Ajoute les enfants d'un jeton ``inline`` à un paragraphe."""
+
+        # Compteurs d'imbrication : Markdown et balises HTML peuvent se cumuler
+        bold = italic = 0
+        href: str | None = None
+        link_text: List[str] = []
+
+        for child in token.children or []:
+            kind = child.type
+            if kind == "text":
+                text = child.content
+            elif kind == "html_inline":
+                match = _HTML_TAG_RE.match(child.content)
+                tag = match.group(2).lower() if match and match.group(2) else ""
+                if tag == "br":
+                    text = "\n"
+                elif tag in _HTML_EMPHASE:
+                    delta = -1 if match.group(1) else 1
+                    if _HTML_EMPHASE[tag] == "bold":
+                        bold = max(bold + delta, 0)
+                    else:
+                        italic = max(italic + delta, 0)
+                    continue
                 else:
-                    run.font.color.rgb = RGBColor(*color)
-            except Exception:
-                pass
-        run.bold = style.get("is_bold", False)
-        run.italic = style.get("is_italic", False)
-
-    def _add_inline(self, paragraph, node) -> None:
-        """Ajoute récursivement les noeuds inline à un paragraphe."""
-
-        if isinstance(node, NavigableString):
-            text = str(node)
-            if text:
-                run = paragraph.add_run(text)
-                self._apply_style(run)
-            return
-
-        for child in node.children:
-            if isinstance(child, NavigableString):
-                text = str(child)
-                if text:
-                    run = paragraph.add_run(text)
-                    self._apply_style(run)
-            elif child.name in {"strong", "b"}:
-                run = paragraph.add_run(child.get_text())
-                self._apply_style(run, {"is_bold": True})
-            elif child.name in {"em", "i"}:
-                run = paragraph.add_run(child.get_text())
-                self._apply_style(run, {"is_italic": True})
-            elif child.name == "code":
-                run = paragraph.add_run(child.get_text())
-                self._apply_style(run)
-                run.font.name = "Consolas"
-                run._element.rPr.rFonts.set(qn("w:eastAsia"), "Consolas")
-            elif child.name == "a":
-                text = child.get_text()
-                href = child.get("href")
-                if href:
-                    run = self._add_hyperlink(paragraph, href, text)
-                    self._apply_style(run)
+                    continue
+            elif kind in {"softbreak", "hardbreak"}:
+                text = "\n"
+            elif kind == "code_inline":
+                if href is not None:
+                    # Code dans un lien : intégré au texte de l'hyperlien
+                    link_text.append(child.content)
                 else:
-                    run = paragraph.add_run(text)
-                    self._apply_style(run)
+                    self._add_run(p, child.content, {"font_name": "Consolas"})
+                continue
+            elif kind == "image":
+                text = child.content
+            elif kind == "strong_open":
+                bold += 1
+                continue
+            elif kind == "strong_close":
+                bold = max(bold - 1, 0)
+                continue
+            elif kind == "em_open":
+                italic += 1
+                continue
+            elif kind == "em_close":
+                italic = max(italic - 1, 0)
+                continue
+            elif kind == "link_open":
+                href = child.attrs.get("href") or ""
+                link_text = []
+                continue
+            elif kind == "link_close":
+                text = "".join(link_text)
+                if href:
+                    self._add_hyperlink(p, href, text)
+                elif text:
+                    self._add_run(p, text)
+                href = None
+                continue
             else:
-                self._add_inline(paragraph, child)
+                continue
 
-    def _add_hyperlink(self, paragraph, url: str, text: str) -> Run:
+            if not text:
+                continue
+            if href is not None:
+                link_text.append(text)
+                continue
+
+            overrides: Dict[str, Any] = {}
+            if bold:
+                overrides["is_bold"] = True
+            if italic:
+                overrides["is_italic"] = True
+            self._add_run(p, text, overrides)
+
+    def _add_hyperlink(self, p: CT_P, url: str, text: str) -> CT_R:
         """Ajoute un hyperlien cliquable au paragraphe."""
 
-        part = paragraph.part
-        r_id = part.relate_to(url, RT.HYPERLINK, is_external=True)
-
-        hyperlink = OxmlElement('w:hyperlink')
-        hyperlink.set(qn('r:id'), r_id)
-
-        new_run = OxmlElement('w:r')
-        r_pr = OxmlElement('w:rPr')
-        r_style = OxmlElement('w:rStyle')
-        r_style.set(qn('w:val'), 'Hyperlink')
-        r_pr.append(r_style)
-        new_run.append(r_pr)
-
-        text_elem = OxmlElement('w:t')
-        text_elem.text = text
-        new_run.append(text_elem)
-        hyperlink.append(new_run)
-        paragraph._p.append(hyperlink)
-
-        return Run(new_run, paragraph)
-
-    def _process_element(self, elem, list_style: str | None = None) -> None:
-        """Traite les éléments HTML convertis depuis le Markdown."""
-
-        if isinstance(elem, NavigableString):
-            text = str(elem).strip()
-            if text:
-                paragraph = (
-                    self.doc.add_paragraph(style=list_style)
-                    if list_style
-                    else self.doc.add_paragraph()
-                )
-                run = paragraph.add_run(text)
-                self._apply_style(run)
+        r_id = self.doc.part.relate_to(url, RT.HYPERLINK, is_external=True)
+
+        hyperlink = copy.deepcopy(_hyperlink_template(self._resolve_style("response", None)))
+        hyperlink.set(_QN_R_ID, r_id)
+        new_run = hyperlink[0]
+        new_run.text = text
+        p.append(hyperlink)
+        return new_run
+
+    def _add_code_block(self, code_text: str) -> None:
+        """Ajoute un bloc de code dans un paragraphe en police Consolas."""
+
+        p = self.doc.element.body.add_p()
+        self._add_run(p, code_text.strip(), {"font_name": "Consolas"})
+
+    def _add_html_block(self, contenu: str) -> None:
+        """Ajoute un bloc HTML brut en conservant sa structure.
+
+        Paragraphes, titres, listes, tableaux et blocs ``pre`` sont recréés ;
+        gras, italique, code, liens et ``<br>`` sont traités comme en Markdown.
+        """
+
+        racine = lxml.html.fragment_fromstring(contenu, create_parent="div")
+        self._add_html_conteneur(racine, None)
+
+    def _add_html_conteneur(self, elem, list_style: str | None) -> None:
+        """Écrit le contenu d'un élément HTML de type bloc.
+
+        Le contenu en ligne consécutif forme un paragraphe (au style
+        ``list_style`` le cas échéant) ; chaque bloc enfant en termine un.
+        """
+
+        segments: List[_SegmentHtml] = []
+        self._segments_html_texte(elem.text, segments, 0, 0)
+        for child in elem:
+            tag = child.tag if isinstance(child.tag, str) else ""
+            if tag in _HTML_BLOCS:
+                self._ecrire_paragraphe_html(segments, list_style)
+                segments = []
+                if tag in _HTML_STYLES_LISTE:
+                    for item in child:
+                        if isinstance(item.tag, str):
+                            self._add_html_conteneur(item, _HTML_STYLES_LISTE[tag])
+                elif tag in _HTML_TITRES:
+                    titre: List[_SegmentHtml] = []
+                    self._segments_html(child, titre, 0, 0)
+                    if _nettoyer_segments(titre):
+                        self._ecrire_segments(
+                            self.doc.add_heading(level=_HTML_TITRES[tag])._p, titre
+                        )
+                elif tag == "pre":
+                    self._add_code_block(child.text_content())
+                elif tag == "table":
+                    self._add_html_table(child)
+                elif tag != "hr":
+                    self._add_html_conteneur(child, list_style)
+            elif tag:
+                self._segments_html_noeud(child, segments, 0, 0)
+            self._segments_html_texte(child.tail, segments, 0, 0)
+        self._ecrire_paragraphe_html(segments, list_style)
+
+    def _add_html_table(self, table_elem) -> None:
+        """Construit un tableau DOCX à partir d'un élément ``<table>``."""
+
+        rows = [
+            [cell for cell in tr if cell.tag in {"td", "th"}]
+            for tr in table_elem.xpath("./tr | ./thead/tr | ./tbody/tr | ./tfoot/tr")
+        ]
+        cols = max((len(row) for row in rows), default=0)
+        if not cols:
             return
+        table = self.doc.add_table(rows=len(rows), cols=cols)
+        for r_idx, row in enumerate(rows):
+            for c_idx, cell in enumerate(row):
+                segments: List[_SegmentHtml] = []
+                self._segments_html(cell, segments, 0, 0)
+                if _nettoyer_segments(segments):
+                    self._ecrire_segments(table.cell(r_idx, c_idx)._tc.p_lst[0], segments)
+
+    def _segments_html(
+        self, elem, segments: List[_SegmentHtml], bold: int, italic: int
+    ) -> None:
+        """Collecte le contenu en ligne d'un élément (texte, enfants et leurs queues)."""
+
+        self._segments_html_texte(elem.text, segments, bold, italic)
+        for child in elem:
+            if isinstance(child.tag, str):
+                self._segments_html_noeud(child, segments, bold, italic)
+            self._segments_html_texte(child.tail, segments, bold, italic)
 
-        tag = elem.name
-        if tag in {"p", "li"}:
-            paragraph = (
-                self.doc.add_paragraph(style=list_style)
-                if list_style
-                else self.doc.add_paragraph()
+    def _segments_html_noeud(
+        self, child, segments: List[_SegmentHtml], bold: int, italic: int
+    ) -> None:
+        """Collecte un élément en ligne, avec les mêmes compteurs d'emphase que ``_add_inline``."""
+
+        tag = child.tag
+        if tag == "br":
+            segments.append(("\n", {}, None))
+        elif tag == "a" and child.get("href"):
+            texte = _HTML_ESPACES_RE.sub(" ", child.text_content())
+            segments.append((texte, {}, child.get("href")))
+        elif tag == "code":
+            texte = _HTML_ESPACES_RE.sub(" ", child.text_content())
+            segments.append((texte, {"font_name": "Consolas"}, None))
+        else:
+            # Bloc imbriqué (cellule de tableau, etc.) : nouvelle ligne
+            if tag in _HTML_BLOCS and segments and segments[-1][0] != "\n":
+                segments.append(("\n", {}, None))
+            emphase = _HTML_EMPHASE.get(tag)
+            self._segments_html(
+                child,
+                segments,
+                bold + (emphase == "bold"),
+                italic + (emphase == "italic"),
             )
-            self._add_inline(paragraph, elem)
-            for child in elem.find_all(["ul", "ol"], recursive=False):
-                self._process_element(
-                    child,
-                    "List Bullet" if child.name == "ul" else "List Number",
-                )
-        elif tag in {"h1", "h2", "h3", "h4", "h5", "h6"}:
-            level = int(tag[1])
-            paragraph = self.doc.add_heading(level=level)
-            self._add_inline(paragraph, elem)
-        elif tag == "ul":
-            for li in elem.find_all("li", recursive=False):
-                self._process_element(li, "List Bullet")
-        elif tag == "ol":
-            for li in elem.find_all("li", recursive=False):
-                self._process_element(li, "List Number")
-        elif tag == "pre":
-            code_text = "".join(elem.strings).strip()
-            paragraph = self.doc.add_paragraph()
-            run = paragraph.add_run(code_text)
-            self._apply_style(run)
-            run.font.name = "Consolas"
-            run._element.rPr.rFonts.set(qn("w:eastAsia"), "Consolas")
-        elif tag == "table":
-            rows = elem.find_all("tr", recursive=False)
-            if rows:
-                first_row_cells = rows[0].find_all(["th", "td"], recursive=False)
-                cols = len(first_row_cells)
-                table = self.doc.add_table(rows=len(rows), cols=cols)
-                for r_idx, row in enumerate(rows):
-                    cells = row.find_all(["th", "td"], recursive=False)
-                    for c_idx, cell in enumerate(cells):
-                        paragraph = table.cell(r_idx, c_idx).paragraphs[0]
-                        self._add_inline(paragraph, cell)
+
+    @staticmethod
+    def _segments_html_texte(
+        texte: str | None, segments: List[_SegmentHtml], bold: int, italic: int
+    ) -> None:
+        """Ajoute un nœud texte HTML (espaces fusionnés) à la liste de segments."""
+
+        if not texte:
+            return
+        overrides: Dict[str, Any] = {}
+        if bold:
+            overrides["is_bold"] = True
+        if italic:
+            overrides["is_italic"] = True
+        segments.append((_HTML_ESPACES_RE.sub(" ", texte), overrides, None))
+
+    def _ecrire_paragraphe_html(
+        self, segments: List[_SegmentHtml], list_style: str | None
+    ) -> None:
+        """Écrit les segments collectés dans un nouveau paragraphe s'ils ne sont pas vides."""
+
+        if not _nettoyer_segments(segments):
+            return
+        if list_style:
+            p = self.doc.add_paragraph(style=list_style)._p
         else:
-            text = elem.get_text(strip=True)
-            if text:
-                paragraph = self.doc.add_paragraph()
-                self._add_inline(paragraph, elem)
+            p = self.doc.element.body.add_p()
+        self._ecrire_segments(p, segments)
+
+    def _ecrire_segments(self, p: CT_P, segments: List[_SegmentHtml]) -> None:
+        """Écrit des segments HTML dans un paragraphe (runs et hyperliens)."""
+
+        for texte, overrides, href in segments:
+            if href:
+                self._add_hyperlink(p, href, texte)
+            elif texte:
+                self._add_run(p, texte, overrides)
+
+    def _add_table(self, rows: List[List[Token | None]]) -> None:
+        """Construit un tableau DOCX à partir des cellules collectées."""
+
+        cols = max((len(row) for row in rows), default=0)
+        if not cols:
+            return
+        table = self.doc.add_table(rows=len(rows), cols=cols)
+        for r_idx, row in enumerate(rows):
+            for c_idx, cell in enumerate(row):
+                if cell is not None:
+                    self._add_inline(table.cell(r_idx, c_idx)._tc.p_lst[0], cell)
+
+    def _process_tokens(self, tokens: List[Token]) -> None:
+        """Parcourt le flux de jetons Markdown et l'écrit dans le document."""
+
+        list_styles: List[str] = []
+        heading_level: int | None = None
+        table_rows: List[List[Token | None]] | None = None
+
+        for token in tokens:
+            kind = token.type
+            if kind == "inline":
+                if table_rows is not None:
+                    if table_rows and table_rows[-1]:
+                        table_rows[-1][-1] = token
+                elif heading_level is not None:
+                    self._add_inline(self.doc.add_heading(level=heading_level)._p, token)
+                elif list_styles:
+                    self._add_inline(self.doc.add_paragraph(style=list_styles[-1])._p, token)
+                else:
+                    # Paragraphe simple : pas besoin des objets python-docx
+                    self._add_inline(self.doc.element.body.add_p(), token)
+            elif kind == "heading_open":
+                heading_level = int(token.tag[1])
+            elif kind == "heading_close":
+                heading_level = None
+            elif kind == "bullet_list_open":
+                list_styles.append("List Bullet")
+            elif kind == "ordered_list_open":
+                list_styles.append("List Number")
+            elif kind in {"bullet_list_close", "ordered_list_close"}:
+                list_styles.pop()
+            elif kind in {"fence", "code_block"}:
+                self._add_code_block(token.content)
+            elif kind == "html_block":
+                self._add_html_block(token.content)
+            elif kind == "table_open":
+                table_rows = []
+            elif kind == "tr_open" and table_rows is not None:
+                table_rows.append([])
+            elif kind in {"th_open", "td_open"} and table_rows:
+                table_rows[-1].append(None)
+            elif kind == "table_close" and table_rows is not None:
+                self._add_table(table_rows)
+                table_rows = None
 
     def add_markdown(self, text: str) -> None:
         """Convertit un texte Markdown et l'ajoute au document avec un fallback."""
@@ -192,13 +489,19 @@ class MarkdownToDocxConverter:
             if not text:
                 return
 
-            md_converter = md.Markdown(extensions=["fenced_code", "tables"])
-            html = md_converter.convert(text)
+            # Fins de ligne normalisées comme le fait markdown-it, pour que le
+            # test de texte brut voie les lignes vides des textes CRLF/CR
+            if "\r" in text:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+            if not _MARKDOWN_SYNTAX_RE.search(text):
+                # Texte brut : un seul paragraphe, sans passer par l'analyseur
+                plain = "\n".join(line.strip() for line in text.strip().split("\n"))
+                if plain:
+                    self._add_run(self.doc.element.body.add_p(), plain)
+                return
 
-            soup = BeautifulSoup(html, "lxml")
-            if soup.body:
-                for elem in soup.body.find_all(recursive=False):
-                    self._process_element(elem)
+            self._process_tokens(_MD_PARSER.parse(text))
         except Exception as e:  # pragma: no cover - fallback branch
             warning_p = self.doc.add_paragraph()
             warning_run = warning_p.add_run(
@@ -221,37 +524,49 @@ def _appliquer_style_run(run, style: Dict):
         run.font.size = Pt(int(style["font_size"]))
     if style.get("font_color_rgb"):
         try:
-            run.font.color.rgb = RGBColor.from_string(style["font_color_rgb"])
+            run.font.color.rgb = _parse_rgb(style["font_color_rgb"])
         except ValueError:
             pass  # Ignore les couleurs mal formatées
 
 
 def _reconstruire_blocs(parent: Union[Document, _Header, _Footer, _Cell], blocs_structure: List[Dict]):
-    """Peuple un conteneur (document, header, etc.) avec le contenu structuré."""
-    for bloc in blocs_structure:
-        type_bloc = bloc.get("type", "paragraph")
-
-        if type_bloc.startswith("heading"):
-            niveau = int(type_bloc.split("_")[-1])
-            p = parent.add_heading(level=niveau)
-        elif type_bloc == "list":
-            for item in bloc.get("items", []):
-                parent.add_paragraph(item, style='List Bullet')
-            continue
-        elif type_bloc == "table":
-            table_data = bloc.get("rows", [])
-            if table_data:
-                table = parent.add_table(rows=len(table_data), cols=len(table_data[0]))
-                for i, row_data in enumerate(table_data):
-                    for j, cell_structure in enumerate(row_data):
-                        _reconstruire_blocs(table.cell(i, j), cell_structure)
-            continue
-        else:  # paragraph
-            p = parent.add_paragraph()
-
-        for run_data in bloc.get("runs", []):
-            run = p.add_run(run_data.get("text", ""))
-            _appliquer_style_run(run, run_data.get("style"))
+    """Peuple un conteneur (document, header, etc.) avec le contenu structuré.
+
+    Les cellules de tableau sont traitées via une pile explicite plutôt que
+    par appels récursifs.
+    """
+    pile = [(parent, blocs_structure)]
+    while pile:
+        parent, blocs_structure = pile.pop()
+        for bloc in blocs_structure:
+            type_bloc = bloc.get("type", "paragraph")
+
+            if type_bloc.startswith("heading"):
+                niveau = int(type_bloc.split("_")[-1])
+                p = parent.add_heading(level=niveau)
+            elif type_bloc == "list":
+                for item in bloc.get("items", []):
+                    parent.add_paragraph(item, style='List Bullet')
+                continue
+            elif type_bloc == "table":
+                table_data = bloc.get("rows", [])
+                if table_data:
+                    table = parent.add_table(rows=len(table_data), cols=len(table_data[0]))
+                    for i, row_data in enumerate(table_data):
+                        for j, cell_structure in enumerate(row_data):
+                            pile.append((table.cell(i, j), cell_structure))
+                continue
+            else:  # paragraph
+                p = parent.add_paragraph()
+
+            # Bloc issu d'une analyse sans styles : texte brut uniquement
+            if "text" in bloc:
+                p.add_run(bloc["text"])
+                continue
+
+            for run_data in bloc.get("runs", []):
+                run = p.add_run(run_data.get("text", ""))
+                _appliquer_style_run(run, run_data.get("style"))
 
 
 def generer_export_docx(document_structure: Dict, styles_interface: Dict) -> io.BytesIO:
@@ -268,14 +583,14 @@ def generer_export_docx(document_structure: Dict, styles_interface: Dict) -> io.
     p_tdm = document.add_paragraph()
     run = p_tdm.add_run()
     fldChar = OxmlElement('w:fldChar')
-    fldChar.set(qn('w:fldCharType'), 'begin')
+    fldChar.set(_QN_FLD_CHAR_TYPE, 'begin')
     run._r.append(fldChar)
     instrText = OxmlElement('w:instrText')
-    instrText.set(qn('xml:space'), 'preserve')
+    instrText.set(_QN_XML_SPACE, 'preserve')
     instrText.text = 'TOC \\o "1-3" \\h \\z \\u'
     run._r.append(instrText)
     fldChar = OxmlElement('w:fldChar')
-    fldChar.set(qn('w:fldCharType'), 'end')
+    fldChar.set(_QN_FLD_CHAR_TYPE, 'end')
     run._r.append(fldChar)
 
     # 3. Reconstruire le corps du document
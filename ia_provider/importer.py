@@ -1,116 +1,238 @@
 from __future__ import annotations
+import io
 import logging
-from typing import Any, Dict, List, Optional, Tuple, Union
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import docx
 from docx.document import Document as DocumentObject
 from docx.section import _Header, _Footer
 from docx.opc.exceptions import OpcError
-from docx.oxml.table import CT_Tbl
-from docx.oxml.text.paragraph import CT_P
+from docx.oxml.ns import nsmap, qn
 from docx.table import Table, _Cell
 from docx.text.paragraph import Paragraph
 import fitz  # PyMuPDF
+from lxml import etree
 
-# Configuration de la journalisation
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+# Journalisation du module : la configuration des handlers est laissée à
+# l'application hôte (Streamlit, etc.)
+logger = logging.getLogger(__name__)
+
+# Balises des blocs de premier niveau (paragraphe, tableau)
+_TAG_P = qn("w:p")
+_TAG_TBL = qn("w:tbl")
+
+# Requêtes XPath précompilées pour l'extraction du texte seul. Le contenu
+# ``mc:Fallback`` (zones de texte) duplique celui de ``mc:Choice`` : ignoré.
+_NS_TEXTE = {
+    "w": nsmap["w"],
+    "mc": "http://schemas.openxmlformats.org/markup-compatibility/2006",
+}
+_XPATH_PARAGRAPHES = etree.XPath(
+    ".//w:p[not(ancestor::mc:Fallback)]", namespaces=_NS_TEXTE
+)
+_XPATH_NIVEAU_PARAGRAPHE = etree.XPath("count(ancestor-or-self::w:p)", namespaces=_NS_TEXTE)
+# Éléments textuels des runs propres au paragraphe (y compris dans w:ins,
+# w:smartTag, w:sdt, w:fldSimple...), hors paragraphes imbriqués.
+_XPATH_TEXTES_PARAGRAPHE = etree.XPath(
+    ".//w:r[count(ancestor::w:p) = $niveau]"
+    "/*[self::w:t or self::w:tab or self::w:br or self::w:cr]",
+    namespaces=_NS_TEXTE,
 )
+_TAG_T = qn("w:t")
+_TAG_BR = qn("w:br")
+_QN_TYPE = qn("w:type")
+# Équivalents texte des éléments de run, comme ``Run.text`` de python-docx
+_TEXTES_ELEMENTS = {qn("w:tab"): "\t", qn("w:cr"): "\n"}
+
+# Styles de titre reconnus : "heading N" / "titre N" -> "heading_N"
+_PREFIXES_TITRE = frozenset({"heading", "titre"})
+_TYPES_TITRE = {"1": "heading_1", "2": "heading_2"}
+
 
+def _contient_texte(texte: str) -> bool:
+    """Indique si ``texte`` contient un caractère non blanc, sans créer de copie comme ``strip()``."""
+    return bool(texte) and not texte.isspace()
 
-def _extraire_style_run(run) -> Dict[str, Any]:
-    """Extrait les informations de style d'un segment de texte (run)."""
-    font = run.font
-    color = font.color.rgb if font.color and font.color.rgb else None
-    return {
-        "text": run.text,
-        "style": {
+
+def _extraire_style_run(
+    run, styles_runs: Optional[Dict[Optional[bytes], Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """Extrait les informations de style d'un segment de texte (run).
+
+    ``styles_runs`` mémorise les styles déjà extraits, indexés par le XML des
+    propriétés du run (``w:rPr``) : les runs de même mise en forme partagent
+    alors le même dictionnaire de style.
+    """
+    rpr = run._r.rPr
+    cle = etree.tostring(rpr) if rpr is not None else None
+    style = styles_runs.get(cle) if styles_runs is not None else None
+    if style is None:
+        font = run.font
+        color = font.color.rgb
+        style = {
             "font_name": font.name,
             "font_size": font.size.pt if font.size else None,
             "is_bold": font.bold,
             "is_italic": font.italic,
             "font_color_rgb": str(color) if color else None,
-        },
-    }
+        }
+        if styles_runs is not None:
+            styles_runs[cle] = style
+    return {"text": run.text, "style": style}
 
 
-def _analyser_contenu_block(parent: Union[DocumentObject, _Header, _Footer, _Cell]) -> List[Dict[str, Any]]:
-    """Analyse un conteneur (document, header, cell, etc.) et retourne la structure des blocs."""
+def _iter_block_items(
+    parent: Union[DocumentObject, _Header, _Footer, _Cell]
+) -> Iterator[Union[Paragraph, Table]]:
+    """Parcourt les paragraphes et tableaux d'un conteneur dans l'ordre du document."""
 
-    block_items = []
     # Logique qui s'adapte au type de "parent"
     if hasattr(parent, "element"):
         # Cas pour le corps du document et les cellules de tableau
         parent_element = parent._tc if isinstance(parent, _Cell) else parent.element.body
         for child in parent_element.iterchildren():
-            if isinstance(child, CT_P):
-                block_items.append(Paragraph(child, parent))
-            elif isinstance(child, CT_Tbl):
-                block_items.append(Table(child, parent))
+            tag = child.tag
+            if tag == _TAG_P:
+                yield Paragraph(child, parent)
+            elif tag == _TAG_TBL:
+                yield Table(child, parent)
     elif hasattr(parent, "paragraphs"):
         # Cas pour les en-têtes (_Header) et pieds de page (_Footer)
         # Note: L'ordre n'est pas garanti si les paragraphes et tableaux sont mélangés
-        block_items.extend(parent.paragraphs)
-        block_items.extend(parent.tables)
-
-    contenu_structure: List[Dict[str, Any]] = []
-    for block in block_items:
-        if isinstance(block, Paragraph):
-            if not block.text.strip():
-                continue
-
-            style_name = block.style.name.lower() if block.style and block.style.name else ""
-
-            # Gestion des listes
-            if "list" in style_name or "liste" in style_name:
-                if contenu_structure and contenu_structure[-1]["type"] == "list":
-                    contenu_structure[-1]["items"].append(block.text)
-                else:
-                    contenu_structure.append({"type": "list", "items": [block.text]})
-                continue
-
-            # Gestion des titres et paragraphes
-            block_type = "paragraph"
-            if style_name.startswith("heading 1") or style_name.startswith("titre 1"):
-                block_type = "heading_1"
-            elif style_name.startswith("heading 2") or style_name.startswith("titre 2"):
-                block_type = "heading_2"
-
-            runs_data = [_extraire_style_run(run) for run in block.runs if run.text.strip()]
-            if runs_data:
-                contenu_structure.append({"type": block_type, "runs": runs_data})
-
-        elif isinstance(block, Table):
-            table_data: List[List[Dict[str, Any]]] = []
-            for row in block.rows:
-                row_data = [_analyser_contenu_block(cell) for cell in row.cells]
-                table_data.append(row_data)
-            if table_data:
-                contenu_structure.append({"type": "table", "rows": table_data})
-
-    return contenu_structure
+        yield from parent.paragraphs
+        yield from parent.tables
+
+
+def _type_de_style(style_name: str) -> str:
+    """Classe un nom de style de paragraphe : "list", "heading_N" ou "paragraph"."""
+    # "liste" contient déjà "list"
+    if "list" in style_name:
+        return "list"
+    prefixe, _, niveau = style_name.partition(" ")
+    if prefixe in _PREFIXES_TITRE:
+        return _TYPES_TITRE.get(niveau[:1], "paragraph")
+    return "paragraph"
+
+
+def _analyser_contenu_block(
+    parent: Union[DocumentObject, _Header, _Footer, _Cell],
+    types_styles: Optional[Dict[Optional[str], str]] = None,
+    styles_runs: Optional[Dict[Optional[bytes], Dict[str, Any]]] = None,
+    with_styles: bool = True,
+) -> List[Dict[str, Any]]:
+    """Analyse un conteneur (document, header, cell, etc.) et retourne la structure des blocs.
+
+    ``types_styles`` mémorise le type de bloc associé à chaque identifiant de
+    style de paragraphe afin de ne résoudre chaque style qu'une seule fois.
+    ``styles_runs`` joue le même rôle pour les styles de runs.
+    Avec ``with_styles=False``, titres et paragraphes ne portent que leur texte
+    (clé ``"text"``) au lieu de la liste de runs stylés.
+    """
+
+    if types_styles is None:
+        types_styles = {}
+    if styles_runs is None:
+        styles_runs = {}
+
+    # Les cellules de tableau sont analysées via une pile explicite : chaque
+    # entrée associe un conteneur à la liste de blocs qu'il doit remplir.
+    structure_racine: List[Dict[str, Any]] = []
+    pile = [(parent, structure_racine)]
+    while pile:
+        conteneur, contenu_structure = pile.pop()
+        for block in _iter_block_items(conteneur):
+            if isinstance(block, Paragraph):
+                style_id = block._p.style
+                block_type = types_styles.get(style_id)
+                if block_type is None:
+                    style = block.style
+                    style_name = style.name.lower() if style and style.name else ""
+                    block_type = types_styles[style_id] = _type_de_style(style_name)
+
+                # Gestion des listes
+                if block_type == "list":
+                    text = block.text
+                    if not _contient_texte(text):
+                        continue
+                    if contenu_structure and contenu_structure[-1]["type"] == "list":
+                        contenu_structure[-1]["items"].append(text)
+                    else:
+                        contenu_structure.append({"type": "list", "items": [text]})
+                    continue
+
+                if not with_styles:
+                    text = block.text
+                    if _contient_texte(text):
+                        contenu_structure.append({"type": block_type, "text": text})
+                    continue
+
+                # Gestion des titres et paragraphes : un paragraphe vide ne
+                # produit aucun run, inutile de calculer block.text au préalable
+                runs_data = [
+                    _extraire_style_run(run, styles_runs)
+                    for run in block.runs
+                    if _contient_texte(run.text)
+                ]
+                if runs_data:
+                    contenu_structure.append({"type": block_type, "runs": runs_data})
+
+            elif isinstance(block, Table):
+                table_data: List[List[List[Dict[str, Any]]]] = []
+                # row.cells répète les cellules fusionnées : chaque w:tc n'est
+                # analysé qu'une fois et son contenu est partagé entre positions
+                cellules_vues: Dict[Any, List[Dict[str, Any]]] = {}
+                for row in block.rows:
+                    row_data: List[List[Dict[str, Any]]] = []
+                    for cell in row.cells:
+                        contenu_cellule = cellules_vues.get(cell._tc)
+                        if contenu_cellule is None:
+                            contenu_cellule = cellules_vues[cell._tc] = []
+                            pile.append((cell, contenu_cellule))
+                        row_data.append(contenu_cellule)
+                    table_data.append(row_data)
+                if table_data:
+                    contenu_structure.append({"type": "table", "rows": table_data})
+
+    return structure_racine
 
 
 def analyser_docx(
     file_stream,
+    with_styles: bool = True,
 ) -> Tuple[Dict[str, List[Dict[str, Any]]], None]:
-    """Extrait le contenu structuré d'un DOCX, y compris en-têtes et pieds de page."""
+    """Extrait le contenu structuré d'un DOCX, y compris en-têtes et pieds de page.
+
+    Avec ``with_styles=False``, la structure est conservée mais les styles de
+    runs ne sont pas extraits : chaque bloc texte porte simplement ``"text"``.
+    """
     try:
         file_stream.seek(0)
         document = docx.Document(file_stream)
 
         # 1. Analyser le corps du document
-        corps_structure = _analyser_contenu_block(document)
+        # Caches limités à ce document (styles de paragraphe et de runs)
+        types_styles: Dict[Optional[str], str] = {}
+        styles_runs: Dict[Optional[bytes], Dict[str, Any]] = {}
+        corps_structure = _analyser_contenu_block(
+            document, types_styles, styles_runs, with_styles
+        )
 
         # 2. Analyser l'en-tête et le pied de page (simplifié à la première section)
         header_structure = []
         footer_structure = []
         if document.sections:
             section = document.sections[0]
-            if section.header:
-                header_structure = _analyser_contenu_block(section.header)
-            if section.footer:
-                footer_structure = _analyser_contenu_block(section.footer)
+            # Sans définition propre (lié au précédent), la première section
+            # n'a pas d'en-tête/pied : y accéder créerait une partie vide.
+            if not section.header.is_linked_to_previous:
+                header_structure = _analyser_contenu_block(
+                    section.header, types_styles, styles_runs, with_styles
+                )
+            if not section.footer.is_linked_to_previous:
+                footer_structure = _analyser_contenu_block(
+                    section.footer, types_styles, styles_runs, with_styles
+                )
 
         document_complet = {
             "header": header_structure,
@@ -120,32 +242,96 @@ def analyser_docx(
         return document_complet, None
 
     except OpcError as e:
-        logging.error(f"Fichier DOCX corrompu : {e}")
+        logger.error("Fichier DOCX corrompu : %s", e)
         return {"header": [], "body": [], "footer": []}, None
     except Exception as e:
-        logging.error(f"Erreur inattendue sur DOCX : {e}", exc_info=True)
+        logger.error("Erreur inattendue sur DOCX : %s", e, exc_info=True)
         return {"header": [], "body": [], "footer": []}, None
 
 
+def _texte_paragraphe(p) -> str:
+    """Reconstitue le texte d'un ``w:p`` (tabulations et sauts de ligne inclus)."""
+    morceaux = []
+    for element in _XPATH_TEXTES_PARAGRAPHE(p, niveau=_XPATH_NIVEAU_PARAGRAPHE(p)):
+        tag = element.tag
+        if tag == _TAG_T:
+            morceaux.append(element.text or "")
+        elif tag == _TAG_BR:
+            # Seuls les retours à la ligne simples produisent du texte
+            if element.get(_QN_TYPE, "textWrapping") == "textWrapping":
+                morceaux.append("\n")
+        else:
+            morceaux.append(_TEXTES_ELEMENTS[tag])
+    return "".join(morceaux)
+
+
+def analyser_docx_texte(file_stream) -> Tuple[str, None]:
+    """Extrait uniquement le texte du corps d'un DOCX, un paragraphe par ligne.
+
+    Chemin rapide pour les appelants qui n'ont pas besoin des styles : les
+    paragraphes (y compris ceux des tableaux) sont lus par XPath directement
+    sur l'arbre XML, sans objets python-docx intermédiaires.
+    """
+    try:
+        file_stream.seek(0)
+        document = docx.Document(file_stream)
+        full_text = io.StringIO()
+        for p in _XPATH_PARAGRAPHES(document.element.body):
+            texte = _texte_paragraphe(p)
+            if _contient_texte(texte):
+                full_text.write(texte)
+                full_text.write("\n")
+        return full_text.getvalue(), None
+
+    except OpcError as e:
+        logger.error("Fichier DOCX corrompu : %s", e)
+        return "", None
+    except Exception as e:
+        logger.error("Erreur inattendue sur DOCX : %s", e, exc_info=True)
+        return "", None
+
+
+def _ouvrir_pdf(file_stream) -> fitz.Document:
+    """Ouvre un PDF avec PyMuPDF en évitant de recopier son contenu en mémoire."""
+    if isinstance(file_stream, io.BytesIO):
+        # Vue sans copie sur le tampon (cas des fichiers importés via Streamlit)
+        return fitz.open(stream=file_stream.getbuffer(), filetype="pdf")
+    name = getattr(file_stream, "name", None)
+    if isinstance(file_stream, io.BufferedReader) and isinstance(name, str) and os.path.isfile(name):
+        return fitz.open(name, filetype="pdf")
+    file_stream.seek(0)
+    return fitz.open(stream=file_stream.read(), filetype="pdf")
+
+
 def analyser_pdf(file_stream) -> Tuple[str, None]:
     """Extrait le contenu textuel brut d'un PDF."""
     try:
-        file_stream.seek(0)
-        with fitz.open(stream=file_stream.read(), filetype="pdf") as doc:
-            full_text = "".join(page.get_text() for page in doc)
-        return full_text, None
+        full_text = io.StringIO()
+        with _ouvrir_pdf(file_stream) as doc:
+            for page in doc:
+                full_text.write(page.get_text())
+        return full_text.getvalue(), None
     except Exception as e:
-        logging.error(f"Erreur inattendue sur PDF : {e}", exc_info=True)
+        logger.error("Erreur inattendue sur PDF : %s", e, exc_info=True)
         return "", None
 
 
 def analyser_document(
     fichier,
+    with_styles: bool = True,
+    texte_seul: bool = False,
 ) -> Tuple[Union[str, Dict[str, List[Dict[str, Any]]]], None]:
-    """Analyse un fichier importé et choisit la méthode appropriée."""
+    """Analyse un fichier importé et choisit la méthode appropriée.
+
+    Pour un DOCX, ``with_styles`` est transmis à ``analyser_docx`` (structure
+    sans styles de runs si ``False``). Avec ``texte_seul=True``, le DOCX est
+    réduit à son texte brut (comme un PDF) via ``analyser_docx_texte``.
+    """
     filename = fichier.name.lower()
     if filename.endswith(".docx"):
-        return analyser_docx(fichier)
+        if texte_seul:
+            return analyser_docx_texte(fichier)
+        return analyser_docx(fichier, with_styles=with_styles)
     if filename.endswith(".pdf"):
         return analyser_pdf(fichier)
     return "", None